@@ -1,10 +1,14 @@
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import create_engine
 from sqlalchemy import pool
 
 from alembic import context
 
+from database import Base, DATABASE_URL
+from migrations import PROGRESS_TABLE
+import models  # noqa: F401  Register models on Base.metadata
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -12,18 +16,19 @@ config = context.config
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+# The dry-run tooling in migrations.py points migrations at a copy of the
+# database through config.attributes and times each revision from outside,
+# so the timings include each revision's commit.
+database_url = config.attributes.get("url", DATABASE_URL)
 
-# other values from the config, defined by the needs of env.py,
-# can be acquired:
-# my_important_option = config.get_main_option("my_important_option")
-# ... etc.
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep migration bookkeeping tables out of autogenerate."""
+    return not (type_ == "table" and name == PROGRESS_TABLE)
 
 
 def run_migrations_offline() -> None:
@@ -38,12 +43,14 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url,
+        url=database_url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -53,19 +60,21 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
-    In this scenario we need to create an Engine
-    and associate a connection with the context.
+    Every revision runs in its own transaction, so a failed revision does
+    not roll back the ones before it. Batch mode lets ALTER operations run
+    on SQLite by rebuilding the table, which copies every row while holding
+    the write lock; see migrations.py for how to keep backfills out of it.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    connectable = create_engine(database_url, poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=True,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
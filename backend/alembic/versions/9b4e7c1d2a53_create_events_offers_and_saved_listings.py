@@ -0,0 +1,101 @@
+"""create events offers and saved listings
+
+Revision ID: 9b4e7c1d2a53
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import create_index_step
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e7c1d2a53'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('venue_name', sa.String(length=200), nullable=False),
+    sa.Column('venue_address', sa.String(length=255), nullable=True),
+    sa.Column('event_date', sa.Date(), nullable=False),
+    sa.Column('event_time', sa.Time(), nullable=True),
+    sa.Column('category', sa.String(length=20), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_table('offers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('ticket_quantity', sa.Integer(), nullable=False),
+    sa.Column('price_per_ticket', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('total_price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('seat_section', sa.String(length=50), nullable=True),
+    sa.Column('seat_row', sa.String(length=20), nullable=True),
+    sa.Column('seat_numbers', sa.String(length=100), nullable=True),
+    sa.Column('ticket_type', sa.String(length=50), nullable=True),
+    sa.Column('transfer_method', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('buyer_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('sold_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_table('saved_listings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('offer_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['offer_id'], ['offers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'offer_id', name='uq_saved_listings_user_offer'),
+    if_not_exists=True,
+    )
+
+    # Indexes are separate steps so offers can be indexed without holding
+    # the table creation transaction open
+    create_index_step('ix_events_id', 'events', ['id'])
+    create_index_step('ix_offers_id', 'offers', ['id'])
+    create_index_step('ix_offers_user_id', 'offers', ['user_id'])
+    create_index_step('ix_offers_buyer_id', 'offers', ['buyer_id'])
+    create_index_step('ix_offers_event_id', 'offers', ['event_id'])
+    create_index_step('ix_saved_listings_id', 'saved_listings', ['id'])
+    create_index_step('ix_saved_listings_user_id', 'saved_listings', ['user_id'])
+    create_index_step('ix_saved_listings_offer_id', 'saved_listings', ['offer_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_saved_listings_offer_id', table_name='saved_listings')
+    op.drop_index('ix_saved_listings_user_id', table_name='saved_listings')
+    op.drop_index('ix_saved_listings_id', table_name='saved_listings')
+    op.drop_table('saved_listings')
+    op.drop_index('ix_offers_event_id', table_name='offers')
+    op.drop_index('ix_offers_buyer_id', table_name='offers')
+    op.drop_index('ix_offers_user_id', table_name='offers')
+    op.drop_index('ix_offers_id', table_name='offers')
+    op.drop_table('offers')
+    op.drop_index('ix_events_id', table_name='events')
+    op.drop_table('events')
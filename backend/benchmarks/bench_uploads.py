@@ -0,0 +1,156 @@
+"""Benchmark concurrent image uploads and their memory ceiling.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.bench_uploads --uploads 16 --concurrency 8 --size-mb 10
+
+Every upload is a distinct noise PNG of roughly the requested size, streamed to
+the API in small chunks. Two ceilings are checked, and the benchmark exits
+non-zero if either is exceeded:
+
+- Python heap growth in the API process while uploads stream in, which should
+  stay bounded by the chunk size rather than by the size of the uploads.
+- Peak RSS of the variant worker processes, which decode one image at a time
+  and so should stay bounded by the size of one decoded image.
+"""
+import argparse
+import asyncio
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+import tracemalloc
+
+import httpx
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uploads  # noqa: E402
+from auth import get_current_user  # noqa: E402
+from main import app  # noqa: E402
+from models import User  # noqa: E402
+
+REQUEST_CHUNK_SIZE = 64 * 1024
+
+
+def worker_max_rss() -> int:
+    """Get a worker's peak RSS in KB. Sleeps so each worker picks up one call."""
+    time.sleep(0.2)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def make_noise_png(size_mb: float) -> bytes:
+    """Create a PNG of random pixels that compresses to roughly size_mb."""
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=0)
+    return buffer.getvalue()
+
+
+async def stream_body(body: bytes):
+    """Yield the request body in small chunks like a network client would."""
+    for offset in range(0, len(body), REQUEST_CHUNK_SIZE):
+        yield body[offset:offset + REQUEST_CHUNK_SIZE]
+
+
+async def run(bodies, concurrency: int) -> float:
+    """Upload every body with bounded concurrency and return the elapsed time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def upload(body: bytes):
+            async with semaphore:
+                response = await client.post("/api/uploads/images", content=stream_body(body))
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(body) for body in bodies))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument(
+        "--ceiling-mb", type=float, default=None,
+        help="Maximum allowed heap growth (default: what each concurrent upload buffers + 8 MB)"
+    )
+    parser.add_argument(
+        "--worker-ceiling-mb", type=float, default=None,
+        help="Maximum allowed worker peak RSS (default: idle worker + 3 decoded images + 16 MB)"
+    )
+    args = parser.parse_args()
+
+    ceiling_mb = args.ceiling_mb
+    if ceiling_mb is None:
+        # The write buffer fills to just under CHUNK_SIZE before one more request
+        # chunk tips it over, and bytearray over-allocates by up to an eighth.
+        # Two more request chunks are in flight: one from the client and one
+        # in the ASGI receive queue.
+        write_buffer = (uploads.CHUNK_SIZE + REQUEST_CHUNK_SIZE) * 9 / 8
+        per_upload = write_buffer + 2 * REQUEST_CHUNK_SIZE
+        ceiling_mb = (args.concurrency * per_upload) / (1024 * 1024) + 8
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, username="bench")
+
+    # Start the workers before the bodies exist so they do not inherit them
+    pool = uploads.get_variant_pool()
+    idle_rss = [pool.submit(worker_max_rss) for _ in range(uploads.VARIANT_WORKERS)]
+    wait(idle_rss)
+    idle_rss_mb = max(future.result() for future in idle_rss) / 1024
+
+    worker_ceiling_mb = args.worker_ceiling_mb
+    if worker_ceiling_mb is None:
+        # A worker holds the decoded original, a full-size copy being resized,
+        # and the variant it writes
+        side = int((args.size_mb * 1024 * 1024 / 3) ** 0.5)
+        decoded_mb = side * side * 3 / (1024 * 1024)
+        worker_ceiling_mb = idle_rss_mb + 3 * decoded_mb + 16
+
+    bodies = [make_noise_png(args.size_mb) for _ in range(args.uploads)]
+    total_mb = sum(len(body) for body in bodies) / (1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        uploads.UPLOAD_DIR = upload_dir
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            elapsed = asyncio.run(run(bodies, args.concurrency))
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            # Waits for the queued variants and reaps the workers, so their
+            # peak RSS shows up in RUSAGE_CHILDREN
+            uploads.shutdown_variant_pool()
+
+    peak_mb = (peak - baseline) / (1024 * 1024)
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    print(f"uploads:         {args.uploads} x {total_mb / args.uploads:.1f} MB, concurrency {args.concurrency}")
+    print(f"elapsed:         {elapsed:.2f} s ({total_mb / elapsed:.1f} MB/s, {args.uploads / elapsed:.1f} uploads/s)")
+    print(f"heap growth:     {peak_mb:.1f} MB (ceiling {ceiling_mb:.1f} MB)")
+    print(f"process max RSS: {max_rss_mb:.1f} MB")
+    print(f"worker max RSS:  {worker_rss_mb:.1f} MB (idle {idle_rss_mb:.1f} MB, ceiling {worker_ceiling_mb:.1f} MB)")
+
+    failed = False
+    if peak_mb > ceiling_mb:
+        print("FAIL: heap growth exceeded the memory ceiling")
+        failed = True
+    if worker_rss_mb > worker_ceiling_mb:
+        print("FAIL: worker RSS exceeded the worker memory ceiling")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Cached user dashboard.
+
+Cached dashboards are dropped when a session commits changes to the data
+they show. Changes are picked up from the unit of work and from bulk
+INSERT/UPDATE/DELETE statements run through a Session, but not from
+statements run on a raw engine or connection. Those stay stale until the
+TTL runs out. The cache lives in each process, so with several uvicorn
+workers a write only invalidates the worker that made it, and other
+workers can serve a stale dashboard for up to DASHBOARD_CACHE_TTL seconds.
+Each process holds at most DASHBOARD_CACHE_MAX_ENTRIES dashboards.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session, selectinload
+from dotenv import load_dotenv
+
+from models import User, Event, Offer, SavedListing
+from schemas import DashboardResponse, DashboardCounts, OfferResponse, SavedListingResponse
+
+load_dotenv()
+
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "10000"))
+
+# Kept in insertion order, which is also expiry order since the TTL is fixed
+_cache: "OrderedDict[int, Tuple[float, DashboardResponse]]" = OrderedDict()
+_cache_lock = threading.Lock()
+# Bumped on every invalidation so a dashboard built before a commit is not cached after it
+_cache_version = 0
+
+# Session.info key for user IDs whose dashboards change when the session commits
+PENDING_INVALIDATIONS = "dashboard_invalidations"
+# Sentinel stored in the pending set when every dashboard has to be dropped
+ALL_USERS = -1
+# Tables whose rows appear on dashboards
+DASHBOARD_TABLES = {Event.__tablename__, Offer.__tablename__, SavedListing.__tablename__}
+
+
+def get_cached_dashboard(user_id: int) -> Optional[DashboardResponse]:
+    """Get a user's cached dashboard if it has not expired."""
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if entry is None:
+            return None
+        expires_at, dashboard = entry
+        if expires_at < time.monotonic():
+            del _cache[user_id]
+            return None
+        return dashboard
+
+
+def get_cache_version() -> int:
+    """Get the current cache version."""
+    with _cache_lock:
+        return _cache_version
+
+
+def cache_dashboard(user_id: int, dashboard: DashboardResponse, version: int) -> None:
+    """Cache a user's dashboard unless an invalidation happened since ``version``.
+
+    Expired dashboards are evicted first, then the oldest ones until the
+    cache is within DASHBOARD_CACHE_MAX_ENTRIES.
+    """
+    with _cache_lock:
+        if version != _cache_version:
+            return
+        now = time.monotonic()
+        _cache.pop(user_id, None)
+        _cache[user_id] = (now + DASHBOARD_CACHE_TTL, dashboard)
+        while _cache:
+            expires_at, _ = next(iter(_cache.values()))
+            if expires_at >= now and len(_cache) <= DASHBOARD_CACHE_MAX_ENTRIES:
+                break
+            _cache.popitem(last=False)
+
+
+def invalidate_dashboard(user_id: Optional[int] = None) -> None:
+    """Drop a user's cached dashboard, or every cached dashboard if no user is given."""
+    global _cache_version
+    with _cache_lock:
+        _cache_version += 1
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+def build_dashboard(db: Session, user: User) -> DashboardResponse:
+    """Load a user's offers, purchases and saved listings.
+
+    Uses a fixed number of queries however many rows the user has: one for
+    offers sold or bought by the user, one IN query for their events, and
+    three for saved listings with their offers and events.
+    """
+    offers = (
+        db.query(Offer)
+        .options(selectinload(Offer.event))
+        .filter(or_(Offer.user_id == user.id, Offer.buyer_id == user.id))
+        .order_by(Offer.created_at.desc(), Offer.id.desc())
+        .all()
+    )
+    saved_listings = (
+        db.query(SavedListing)
+        .options(selectinload(SavedListing.offer).selectinload(Offer.event))
+        .filter(SavedListing.user_id == user.id)
+        .order_by(SavedListing.created_at.desc(), SavedListing.id.desc())
+        .all()
+    )
+
+    own_offers = [offer for offer in offers if offer.user_id == user.id]
+    purchases = [offer for offer in offers if offer.buyer_id == user.id]
+
+    return DashboardResponse(
+        offers=[OfferResponse.model_validate(offer) for offer in own_offers],
+        purchases=[OfferResponse.model_validate(offer) for offer in purchases],
+        saved_listings=[SavedListingResponse.model_validate(saved) for saved in saved_listings],
+        counts=DashboardCounts(
+            offers=len(own_offers),
+            active_offers=sum(1 for offer in own_offers if offer.status == "active"),
+            sold_offers=sum(1 for offer in own_offers if offer.status == "sold"),
+            purchases=len(purchases),
+            saved_listings=len(saved_listings),
+        ),
+    )
+
+
+def get_dashboard(db: Session, user: User) -> DashboardResponse:
+    """Get a user's dashboard, building and caching it on a miss."""
+    dashboard = get_cached_dashboard(user.id)
+    if dashboard is None:
+        version = get_cache_version()
+        dashboard = build_dashboard(db, user)
+        cache_dashboard(user.id, dashboard, version)
+    return dashboard
+
+
+def _attribute_values(obj, name: str) -> Set[int]:
+    """Get the current and previous values of an attribute in a flush."""
+    history = inspect(obj).attrs[name].history
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(PENDING_INVALIDATIONS, set())
+    offer_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Event):
+            # A new event is on no dashboard until an offer for it is added,
+            # but a changed one can be on any, so drop them all
+            if obj not in session.new:
+                pending.add(ALL_USERS)
+        elif isinstance(obj, Offer):
+            pending.update(_attribute_values(obj, "user_id"))
+            pending.update(_attribute_values(obj, "buyer_id"))
+            offer_ids.add(obj.id)
+        elif isinstance(obj, SavedListing):
+            pending.update(_attribute_values(obj, "user_id"))
+
+    if offer_ids and ALL_USERS not in pending:
+        # Users who saved a changed offer see it on their dashboard too
+        saved_by = session.connection().execute(
+            select(SavedListing.user_id).where(SavedListing.offer_id.in_(offer_ids))
+        )
+        pending.update(saved_by.scalars())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_invalidations(orm_execute_state):
+    # Bulk statements skip the unit of work, and the rows they touch are not
+    # known up front, so drop every dashboard
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name in DASHBOARD_TABLES:
+        pending = orm_execute_state.session.info.setdefault(PENDING_INVALIDATIONS, set())
+        pending.add(ALL_USERS)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop(PENDING_INVALIDATIONS, None)
+    if not pending:
+        return
+    if ALL_USERS in pending:
+        invalidate_dashboard()
+        return
+    for user_id in pending:
+        invalidate_dashboard(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    # Rolling back a SAVEPOINT keeps the changes flushed before it, and
+    # over-invalidating for the ones flushed inside it is harmless
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_INVALIDATIONS, None)
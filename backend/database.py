@@ -19,8 +19,3 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
-
-def create_tables():
-    """Create all database tables."""
-    from models import User  # Import here to avoid circular imports
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, BackgroundTasks, status
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -7,9 +8,9 @@ import os
 from dotenv import load_dotenv
 
 # Local imports
-from database import get_db, create_tables, engine
+from database import get_db, engine
 from models import User
-from schemas import UserCreate, UserLogin, UserResponse, UserWithToken, Token, ErrorResponse
+from schemas import UserCreate, UserLogin, UserResponse, UserWithToken, Token, ErrorResponse, ImageUploadResponse, DashboardResponse
 from auth import (
     get_password_hash, 
     authenticate_user, 
@@ -19,6 +20,20 @@ from auth import (
     get_user_by_username,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from dashboard import get_dashboard
+from uploads import (
+    store_image_stream,
+    generate_variants,
+    missing_variants,
+    shutdown_variant_pool,
+    image_urls,
+    original_path,
+    variant_path,
+    FILENAME_PATTERN,
+    IMAGE_VARIANTS,
+    MEDIA_TYPES,
+    CACHE_CONTROL
+)
 
 # Load environment variables
 load_dotenv()
@@ -39,10 +54,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create tables on startup
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_variant_pool()
 
 @app.get("/")
 async def root():
@@ -164,6 +178,80 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
         updated_at=current_user.updated_at
     )
 
+@app.get("/api/users/me/dashboard", response_model=DashboardResponse)
+async def get_user_dashboard(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's offers, purchases and saved listings"""
+    return get_dashboard(db, current_user)
+
+@app.post("/api/uploads/images", response_model=ImageUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_image(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Upload an event image as the raw request body"""
+    filename, created = await store_image_stream(request.stream())
+    if missing_variants(filename):
+        # Also covers duplicates whose earlier render failed or never ran
+        background_tasks.add_task(generate_variants, filename)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+
+    urls = image_urls(filename)
+    return ImageUploadResponse(
+        filename=filename,
+        url=urls.pop("original"),
+        variants=urls,
+        created=created
+    )
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether an If-None-Match header matches an ETag"""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+def image_file_response(request: Request, path: str, filename: str, etag: str) -> Response:
+    """Serve a stored image with long-lived cache headers, or 304 if the client has it"""
+    if not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    extension = filename.rsplit(".", 1)[1]
+    return FileResponse(path, media_type=MEDIA_TYPES[extension], headers=headers)
+
+@app.get("/api/uploads/images/{filename}")
+async def get_image(filename: str, request: Request):
+    """Get an uploaded image"""
+    if not FILENAME_PATTERN.match(filename):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return image_file_response(request, original_path(filename), filename, f'"{filename}"')
+
+@app.get("/api/uploads/images/{variant}/{filename}")
+async def get_image_variant(variant: str, filename: str, request: Request):
+    """Get a resized variant of an uploaded image"""
+    if variant not in IMAGE_VARIANTS or not FILENAME_PATTERN.match(filename):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return image_file_response(
+        request, variant_path(filename, variant), filename, f'"{variant}-{filename}"'
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,392 @@
+"""Helpers for running schema migrations against large tables.
+
+Migration scripts in ``alembic/versions`` use these to keep each step short:
+backfills commit every batch and can resume after an interruption, and
+indexes are built in their own step outside the schema change transaction.
+
+The environment runs ALTER operations in Alembic batch mode. On SQLite,
+which cannot alter most column properties in place, batch mode copies the
+whole table into a new one and swaps it in. That rebuild holds the write
+lock for the full copy, so it takes time proportional to the table size
+and does not get shorter by being batched. Keep backfills out of
+``op.batch_alter_table`` blocks: add the nullable column in one step, fill
+it with ``backfill_in_batches``, then tighten constraints in a later step.
+On PostgreSQL batch mode issues plain ALTER statements.
+
+Run ``python migrations.py dry-run`` to time ``alembic upgrade head`` against
+a seeded copy of the database without touching the original.
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import command, op
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.url import make_url
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+BACKFILL_BATCH_SIZE = 1000
+SEED_BATCH_SIZE = 10000
+# Seeded offers are spread over one synthetic event per this many offers
+SEED_OFFERS_PER_EVENT = 100
+PROGRESS_TABLE = "alembic_backfill_progress"
+
+progress_table = sa.table(
+    PROGRESS_TABLE,
+    sa.column("name", sa.String),
+    sa.column("last_key", sa.Integer),
+)
+
+
+def _ensure_progress_table(connection: Connection) -> None:
+    """Create the table that records backfill progress if it is missing."""
+    sa.Table(
+        PROGRESS_TABLE,
+        sa.MetaData(),
+        sa.Column("name", sa.String(255), primary_key=True),
+        sa.Column("last_key", sa.Integer, nullable=False),
+    ).create(connection, checkfirst=True)
+
+
+def _commit(connection: Connection) -> None:
+    """Commit the connection's current transaction, if one is open.
+
+    Inside an Alembic autocommit block every statement already commits on
+    its own, and the transaction object belongs to Alembic, so it is left
+    alone.
+    """
+    if connection.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+        return
+    if connection.in_transaction():
+        connection.commit()
+
+
+def run_backfill(
+    connection: Connection,
+    name: str,
+    table_name: str,
+    values: Dict[str, sa.sql.ClauseElement],
+    where: Optional[sa.sql.ClauseElement] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    key: str = "id",
+) -> int:
+    """Update a table in primary key order, committing after every batch.
+
+    Progress is stored under ``name`` so an interrupted backfill resumes from
+    the last committed batch. The update must be idempotent, since the batch
+    in flight when the process stopped is applied again. Returns the number
+    of rows updated.
+    """
+    _ensure_progress_table(connection)
+    table = sa.table(table_name, sa.column(key), *(sa.column(column) for column in values))
+    key_column = table.c[key]
+
+    last_key = connection.execute(
+        sa.select(progress_table.c.last_key).where(progress_table.c.name == name)
+    ).scalar()
+    if last_key is None:
+        connection.execute(sa.insert(progress_table).values(name=name, last_key=0))
+        last_key = 0
+    _commit(connection)
+
+    updated = 0
+    while True:
+        window = (
+            sa.select(key_column)
+            .where(key_column > last_key)
+            .order_by(key_column)
+            .limit(batch_size)
+            .subquery()
+        )
+        upper_key = connection.execute(sa.select(sa.func.max(window.c[key]))).scalar()
+        if upper_key is None:
+            break
+
+        statement = sa.update(table).where(key_column > last_key, key_column <= upper_key)
+        if where is not None:
+            statement = statement.where(where)
+        updated += connection.execute(statement.values(**values)).rowcount
+        connection.execute(
+            sa.update(progress_table)
+            .where(progress_table.c.name == name)
+            .values(last_key=upper_key)
+        )
+        _commit(connection)
+        last_key = upper_key
+
+    connection.execute(sa.delete(progress_table).where(progress_table.c.name == name))
+    _commit(connection)
+    return updated
+
+
+def backfill_in_batches(
+    name: str,
+    table_name: str,
+    values: Dict[str, sa.sql.ClauseElement],
+    where: Optional[sa.sql.ClauseElement] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    key: str = "id",
+) -> int:
+    """Run a resumable batched backfill from inside a migration script."""
+    with op.get_context().autocommit_block():
+        return run_backfill(op.get_bind(), name, table_name, values, where, batch_size, key)
+
+
+def create_index_step(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    unique: bool = False,
+) -> None:
+    """Create an index as its own step, outside the migration transaction.
+
+    On PostgreSQL the index is built concurrently so writes are not blocked.
+    Existing indexes are skipped, which makes the step safe to re-run.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            unique=unique,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def get_alembic_config(url: Optional[str] = None) -> Config:
+    """Get the Alembic configuration, optionally pointed at another database."""
+    config = Config(ALEMBIC_INI)
+    if url is not None:
+        config.attributes["url"] = url
+    return config
+
+
+def _seed_rows(
+    connection: Connection,
+    table: sa.sql.TableClause,
+    count: int,
+    make_row: Callable[[int], Dict[str, object]],
+    batch_size: int = SEED_BATCH_SIZE,
+) -> None:
+    """Insert ``count`` generated rows in batches, numbering them after the existing rows."""
+    offset = connection.execute(sa.select(sa.func.count()).select_from(table)).scalar()
+    for start in range(offset, offset + count, batch_size):
+        stop = min(start + batch_size, offset + count)
+        connection.execute(sa.insert(table), [make_row(index) for index in range(start, stop)])
+        connection.commit()
+
+
+def seed_users(url: str, count: int, batch_size: int = SEED_BATCH_SIZE) -> None:
+    """Insert synthetic users so migrations are timed against realistic volume."""
+    engine = sa.create_engine(url)
+    users = sa.table(
+        "users",
+        sa.column("username"),
+        sa.column("email"),
+        sa.column("hashed_password"),
+        sa.column("is_active"),
+    )
+    try:
+        with engine.connect() as connection:
+            _seed_rows(connection, users, count, lambda index: {
+                "username": f"seed_user_{index}",
+                "email": f"seed_user_{index}@example.com",
+                "hashed_password": "seeded",
+                "is_active": True,
+            }, batch_size)
+    finally:
+        engine.dispose()
+
+
+def seed_offers(url: str, count: int, batch_size: int = SEED_BATCH_SIZE) -> None:
+    """Insert synthetic events and offers sold by existing users."""
+    engine = sa.create_engine(url)
+    users = sa.table("users", sa.column("id"))
+    events = sa.table(
+        "events",
+        sa.column("id"),
+        sa.column("name"),
+        sa.column("venue_name"),
+        sa.column("event_date"),
+        sa.column("category"),
+    )
+    offers = sa.table(
+        "offers",
+        sa.column("user_id"),
+        sa.column("event_id"),
+        sa.column("title"),
+        sa.column("ticket_quantity"),
+        sa.column("price_per_ticket"),
+        sa.column("total_price"),
+        sa.column("status"),
+    )
+    try:
+        with engine.connect() as connection:
+            seller_ids = connection.execute(
+                sa.select(users.c.id).order_by(users.c.id).limit(1000)
+            ).scalars().all()
+            if not seller_ids:
+                raise ValueError("Seeding offers needs at least one user, add some with --seed-users")
+
+            first_event_id = (connection.execute(sa.select(sa.func.max(events.c.id))).scalar() or 0) + 1
+            event_count = -(-count // SEED_OFFERS_PER_EVENT)
+            _seed_rows(connection, events, event_count, lambda index: {
+                "name": f"Seed event {index}",
+                "venue_name": "Seed venue",
+                "event_date": datetime.date(2030, 1, 1) + datetime.timedelta(days=index % 365),
+                "category": "other",
+            }, batch_size)
+            _seed_rows(connection, offers, count, lambda index: {
+                "user_id": seller_ids[index % len(seller_ids)],
+                "event_id": first_event_id + index % event_count,
+                "title": f"Seed offer {index}",
+                "ticket_quantity": 2,
+                "price_per_ticket": 25,
+                "total_price": 50,
+                "status": "active",
+            }, batch_size)
+    finally:
+        engine.dispose()
+
+
+def pending_revisions(config: Config, url: str) -> list:
+    """Get the revisions that ``alembic upgrade head`` would apply, oldest first."""
+    engine = sa.create_engine(url)
+    try:
+        with engine.connect() as connection:
+            current = MigrationContext.configure(connection).get_current_revision()
+    finally:
+        engine.dispose()
+
+    script = ScriptDirectory.from_config(config)
+    return list(reversed(list(script.iterate_revisions("heads", current or "base"))))
+
+
+def dry_run(source_url: str, seed_count: int = 0, seed_offer_count: int = 0) -> List[Dict[str, object]]:
+    """Time ``alembic upgrade head`` against a copy of a SQLite database.
+
+    The copy is made with the SQLite backup API, optionally seeded with
+    ``seed_count`` extra users and ``seed_offer_count`` extra offers, then
+    upgraded one revision at a time. Seeding needs the copy to already
+    have the seeded tables, and raises ValueError otherwise. Each
+    revision is timed around its own ``alembic upgrade`` call, so the time
+    includes its commit, which is a large part of a SQLite table rebuild, as
+    well as a little Alembic start-up overhead.
+    Returns one report row per step: seeding, each applied revision, and the
+    total upgrade time.
+    """
+    source = make_url(source_url)
+    if source.get_backend_name() != "sqlite":
+        raise ValueError("Dry runs are only supported for SQLite databases")
+
+    workdir = tempfile.mkdtemp(prefix="migration-dry-run-")
+    copy_path = os.path.join(workdir, "dry_run.db")
+    try:
+        target = sqlite3.connect(copy_path)
+        try:
+            if source.database and os.path.exists(source.database):
+                original = sqlite3.connect(source.database)
+                try:
+                    original.backup(target)
+                finally:
+                    original.close()
+        finally:
+            target.close()
+
+        copy_url = f"sqlite:///{copy_path}"
+        timings: List[Dict[str, object]] = []
+        seeds = [
+            (seed_users, seed_count, ["users"], "users"),
+            (seed_offers, seed_offer_count, ["users", "events", "offers"], "offers"),
+        ]
+        for seed, count, tables, noun in seeds:
+            if not count:
+                continue
+            engine = sa.create_engine(copy_url)
+            try:
+                missing = [table for table in tables if not sa.inspect(engine).has_table(table)]
+            finally:
+                engine.dispose()
+            if missing:
+                raise ValueError(
+                    f"Seeding {noun} needs a database that already has the {', '.join(missing)} "
+                    "table(s), run alembic upgrade head on it first"
+                )
+            started = time.perf_counter()
+            seed(copy_url, count)
+            timings.append({
+                "revision": "seed",
+                "description": f"insert {count} {noun} (not part of the upgrade)",
+                "seconds": time.perf_counter() - started,
+            })
+
+        config = get_alembic_config(copy_url)
+        upgrade_started = time.perf_counter()
+        for script in pending_revisions(config, copy_url):
+            started = time.perf_counter()
+            command.upgrade(config, script.revision)
+            timings.append({
+                "revision": script.revision,
+                "description": (script.doc or "").strip(),
+                "seconds": time.perf_counter() - started,
+            })
+        timings.append({
+            "revision": "total",
+            "description": "alembic upgrade head",
+            "seconds": time.perf_counter() - upgrade_started,
+        })
+        return timings
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(timings: List[Dict[str, object]]) -> None:
+    """Print a dry-run timing report."""
+    if not any(row["revision"] not in ("seed", "total") for row in timings):
+        print("Database is already at head, no migrations to apply")
+    for row in timings:
+        print(f"{row['revision']:<16} {row['seconds']:>9.3f}s  {row['description']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema migration tooling")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    dry_run_parser = subparsers.add_parser(
+        "dry-run", help="Time alembic upgrade head against a seeded copy of the database"
+    )
+    dry_run_parser.add_argument(
+        "--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./tickets_p2p.db")
+    )
+    dry_run_parser.add_argument(
+        "--seed-users", type=int, default=0, help="Number of synthetic users to add to the copy"
+    )
+    dry_run_parser.add_argument(
+        "--seed-offers", type=int, default=0,
+        help="Number of synthetic offers, with events, to add to the copy"
+    )
+    args = parser.parse_args()
+
+    if args.command == "dry-run":
+        try:
+            timings = dry_run(args.database_url, args.seed_users, args.seed_offers)
+        except ValueError as error:
+            dry_run_parser.error(str(error))
+        print_report(timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Date, Time, Text, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
@@ -14,5 +15,76 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    offers = relationship("Offer", foreign_keys="Offer.user_id", back_populates="seller")
+    purchases = relationship("Offer", foreign_keys="Offer.buyer_id", back_populates="buyer")
+    saved_listings = relationship("SavedListing", back_populates="user", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>" 
+
+class Event(Base):
+    """Event model for concerts, theatre shows, sports and other events"""
+    __tablename__ = "events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    venue_name = Column(String(200), nullable=False)
+    venue_address = Column(String(255), nullable=True)
+    event_date = Column(Date, nullable=False)
+    event_time = Column(Time, nullable=True)
+    category = Column(String(20), nullable=False, default="other")
+    image_url = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    offers = relationship("Offer", back_populates="event")
+    
+    def __repr__(self):
+        return f"<Event(id={self.id}, name='{self.name}', event_date={self.event_date})>"
+
+class Offer(Base):
+    """Offer model for tickets listed for resale"""
+    __tablename__ = "offers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), index=True, nullable=False)
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    ticket_quantity = Column(Integer, nullable=False, default=1)
+    price_per_ticket = Column(Numeric(10, 2), nullable=False)
+    total_price = Column(Numeric(10, 2), nullable=False)
+    seat_section = Column(String(50), nullable=True)
+    seat_row = Column(String(20), nullable=True)
+    seat_numbers = Column(String(100), nullable=True)
+    ticket_type = Column(String(50), nullable=True)
+    transfer_method = Column(String(50), nullable=True)
+    status = Column(String(20), nullable=False, default="active")
+    buyer_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    sold_at = Column(DateTime(timezone=True), nullable=True)
+    
+    seller = relationship("User", foreign_keys=[user_id], back_populates="offers")
+    buyer = relationship("User", foreign_keys=[buyer_id], back_populates="purchases")
+    event = relationship("Event", back_populates="offers")
+    
+    def __repr__(self):
+        return f"<Offer(id={self.id}, title='{self.title}', status='{self.status}')>"
+
+class SavedListing(Base):
+    """Saved listing model for offers bookmarked by a user"""
+    __tablename__ = "saved_listings"
+    __table_args__ = (UniqueConstraint("user_id", "offer_id", name="uq_saved_listings_user_offer"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    offer_id = Column(Integer, ForeignKey("offers.id"), index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    user = relationship("User", back_populates="saved_listings")
+    offer = relationship("Offer")
+    
     def __repr__(self):
-        return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>" 
\ No newline at end of file
+        return f"<SavedListing(id={self.id}, user_id={self.user_id}, offer_id={self.offer_id})>"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
 
 # User schemas
 class UserBase(BaseModel):
@@ -50,4 +50,73 @@ class MessageResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Schema for error responses"""
-    detail: str 
\ No newline at end of file
+    detail: str
+
+class ImageUploadResponse(BaseModel):
+    """Schema for an uploaded image and its variant URLs"""
+    filename: str
+    url: str
+    variants: Dict[str, str]
+    created: bool
+
+class EventSummary(BaseModel):
+    """Schema for event details shown alongside offers"""
+    id: int
+    name: str
+    venue_name: str
+    event_date: date
+    event_time: Optional[time] = None
+    category: str
+    image_url: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class OfferResponse(BaseModel):
+    """Schema for offer response"""
+    id: int
+    user_id: int
+    event_id: int
+    title: str
+    description: Optional[str] = None
+    ticket_quantity: int
+    price_per_ticket: float
+    total_price: float
+    seat_section: Optional[str] = None
+    seat_row: Optional[str] = None
+    seat_numbers: Optional[str] = None
+    ticket_type: Optional[str] = None
+    transfer_method: Optional[str] = None
+    status: str
+    buyer_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    sold_at: Optional[datetime] = None
+    event: EventSummary
+    
+    class Config:
+        from_attributes = True
+
+class SavedListingResponse(BaseModel):
+    """Schema for an offer saved by the user"""
+    id: int
+    created_at: datetime
+    offer: OfferResponse
+    
+    class Config:
+        from_attributes = True
+
+class DashboardCounts(BaseModel):
+    """Schema for user dashboard totals"""
+    offers: int
+    active_offers: int
+    sold_offers: int
+    purchases: int
+    saved_listings: int
+
+class DashboardResponse(BaseModel):
+    """Schema for the user dashboard"""
+    offers: List[OfferResponse]
+    purchases: List[OfferResponse]
+    saved_listings: List[SavedListingResponse]
+    counts: DashboardCounts
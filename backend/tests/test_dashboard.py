@@ -0,0 +1,322 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, update
+from sqlalchemy.orm import sessionmaker
+from main import app, get_db
+from models import Base, User, Event, Offer, SavedListing
+from schemas import DashboardResponse, DashboardCounts
+from auth import create_access_token
+import dashboard
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Create a database for the test and route requests to it"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'dashboard.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    dashboard.invalidate_dashboard()
+    yield TestingSessionLocal
+
+    if previous_override is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous_override
+    dashboard.invalidate_dashboard()
+    engine.dispose()
+
+@pytest.fixture
+def query_counter(session_factory):
+    """Count SQL statements sent to the test database"""
+    statements = []
+    engine = session_factory.kw["bind"]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+@pytest.fixture
+def client():
+    """Create a test client"""
+    return TestClient(app)
+
+def create_user(db, username):
+    """Create a user and return it with its authorization headers"""
+    user = User(username=username, email=f"{username}@example.com", hashed_password="hashed")
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": str(user.id)})
+    return user, {"Authorization": f"Bearer {token}"}
+
+def create_offers(db, seller, count, buyer=None, status="active"):
+    """Create offers for a new event"""
+    event = Event(name="Concert", venue_name="Arena", event_date=date(2030, 1, 1), category="concert")
+    offers = [
+        Offer(
+            seller=seller,
+            buyer=buyer,
+            event=event,
+            title=f"Ticket {index}",
+            ticket_quantity=2,
+            price_per_ticket=Decimal("25.00"),
+            total_price=Decimal("50.00"),
+            status=status,
+        )
+        for index in range(count)
+    ]
+    db.add_all(offers)
+    db.commit()
+    return offers
+
+def empty_dashboard():
+    """Create a dashboard with no rows"""
+    return DashboardResponse(
+        offers=[], purchases=[], saved_listings=[],
+        counts=DashboardCounts(offers=0, active_offers=0, sold_offers=0, purchases=0, saved_listings=0),
+    )
+
+class TestDashboard:
+    """Test the user dashboard endpoint"""
+
+    def test_dashboard_contents(self, client, session_factory):
+        """Test the dashboard lists offers, purchases, saved listings and counts"""
+        db = session_factory()
+        seller, seller_headers = create_user(db, "seller")
+        buyer, buyer_headers = create_user(db, "buyer")
+        create_offers(db, seller, 2)
+        sold = create_offers(db, seller, 1, buyer=buyer, status="sold")
+        db.add(SavedListing(user=buyer, offer=sold[0]))
+        db.commit()
+        sold_id = sold[0].id
+        db.close()
+
+        response = client.get("/api/users/me/dashboard", headers=seller_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["offers"]) == 3
+        assert data["purchases"] == []
+        assert data["counts"] == {
+            "offers": 3, "active_offers": 2, "sold_offers": 1, "purchases": 0, "saved_listings": 0
+        }
+
+        response = client.get("/api/users/me/dashboard", headers=buyer_headers)
+        data = response.json()
+        assert data["offers"] == []
+        assert [offer["title"] for offer in data["purchases"]] == ["Ticket 0"]
+        assert data["purchases"][0]["event"]["name"] == "Concert"
+        assert data["saved_listings"][0]["offer"]["id"] == sold_id
+        assert data["counts"]["purchases"] == 1
+        assert data["counts"]["saved_listings"] == 1
+
+    @pytest.mark.parametrize("offer_count", [1, 40])
+    def test_dashboard_query_count(self, client, session_factory, query_counter, offer_count):
+        """Test the dashboard uses a fixed number of queries however many offers there are"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        buyer, _ = create_user(db, "buyer")
+        for _ in range(offer_count):
+            create_offers(db, seller, 1)
+        purchased = create_offers(db, buyer, offer_count, buyer=seller, status="sold")
+        db.add_all([SavedListing(user=seller, offer=offer) for offer in purchased])
+        db.commit()
+        db.close()
+
+        query_counter.clear()
+        response = client.get("/api/users/me/dashboard", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["counts"]["offers"] == offer_count
+        # User lookup, offers, their events, saved listings, their offers and events
+        assert len(query_counter) <= 6
+
+    def test_dashboard_cached(self, client, session_factory, query_counter):
+        """Test a repeated request is served from the cache"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        create_offers(db, seller, 3)
+        db.close()
+
+        client.get("/api/users/me/dashboard", headers=headers)
+        query_counter.clear()
+        response = client.get("/api/users/me/dashboard", headers=headers)
+
+        assert response.json()["counts"]["offers"] == 3
+        assert len(query_counter) == 1  # Only the current user lookup
+
+    def test_dashboard_invalidated_by_writes(self, client, session_factory):
+        """Test writes to a user's data refresh only the affected dashboards"""
+        db = session_factory()
+        seller, seller_headers = create_user(db, "seller")
+        saver, saver_headers = create_user(db, "saver")
+        other, other_headers = create_user(db, "other")
+        offer = create_offers(db, seller, 1)[0]
+        db.add(SavedListing(user=saver, offer=offer))
+        db.commit()
+
+        for headers in (seller_headers, saver_headers, other_headers):
+            client.get("/api/users/me/dashboard", headers=headers)
+
+        user_ids = [seller.id, saver.id, other.id]
+        offer.status = "sold"
+        offer.buyer = other
+        db.commit()
+        db.close()
+
+        for user_id in user_ids:
+            assert dashboard.get_cached_dashboard(user_id) is None
+
+        data = client.get("/api/users/me/dashboard", headers=seller_headers).json()
+        assert data["counts"]["sold_offers"] == 1
+        data = client.get("/api/users/me/dashboard", headers=saver_headers).json()
+        assert data["saved_listings"][0]["offer"]["status"] == "sold"
+        data = client.get("/api/users/me/dashboard", headers=other_headers).json()
+        assert data["counts"]["purchases"] == 1
+
+    def test_dashboard_untouched_by_other_users_writes(self, client, session_factory):
+        """Test a user's cached dashboard survives writes to unrelated data"""
+        db = session_factory()
+        seller, seller_headers = create_user(db, "seller")
+        other, _ = create_user(db, "other")
+        create_offers(db, seller, 1)
+        other_offer = create_offers(db, other, 1)[0]
+
+        client.get("/api/users/me/dashboard", headers=seller_headers)
+        seller_id = seller.id
+        other_offer.title = "Renamed"
+        db.commit()
+        db.close()
+
+        assert dashboard.get_cached_dashboard(seller_id) is not None
+
+    @pytest.mark.parametrize("bulk_update", [
+        lambda db: db.query(Offer).update({"status": "sold"}),
+        lambda db: db.execute(update(Offer).values(status="sold")),
+        lambda db: db.execute(update(Offer.__table__).values(status="sold")),
+    ])
+    def test_dashboard_invalidated_by_bulk_updates(self, client, session_factory, bulk_update):
+        """Test bulk updates run through a session refresh cached dashboards"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        create_offers(db, seller, 1)
+        db.close()
+        client.get("/api/users/me/dashboard", headers=headers)
+
+        db = session_factory()
+        bulk_update(db)
+        db.commit()
+        db.close()
+
+        counts = client.get("/api/users/me/dashboard", headers=headers).json()["counts"]
+        assert counts["active_offers"] == 0
+        assert counts["sold_offers"] == 1
+
+    @pytest.mark.parametrize("saved_listing_table", [SavedListing, SavedListing.__table__])
+    def test_dashboard_invalidated_by_bulk_inserts(self, client, session_factory, saved_listing_table):
+        """Test bulk inserts run through a session refresh cached dashboards"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        seller_id = seller.id
+        offer_id = create_offers(db, seller, 1)[0].id
+        db.close()
+        client.get("/api/users/me/dashboard", headers=headers)
+
+        db = session_factory()
+        db.execute(insert(saved_listing_table), [{"user_id": seller_id, "offer_id": offer_id}])
+        db.commit()
+        db.close()
+
+        counts = client.get("/api/users/me/dashboard", headers=headers).json()["counts"]
+        assert counts["saved_listings"] == 1
+
+    def test_dashboard_invalidated_after_rolled_back_savepoint(self, client, session_factory):
+        """Test rolling back a savepoint keeps invalidations flushed before it"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        seller_id = seller.id
+        offer = create_offers(db, seller, 1)[0]
+        client.get("/api/users/me/dashboard", headers=headers)
+
+        offer.status = "sold"
+        db.flush()
+        savepoint = db.begin_nested()
+        offer.title = "Renamed"
+        db.flush()
+        savepoint.rollback()
+        db.commit()
+        db.close()
+
+        assert dashboard.get_cached_dashboard(seller_id) is None
+        counts = client.get("/api/users/me/dashboard", headers=headers).json()["counts"]
+        assert counts["sold_offers"] == 1
+
+    def test_dashboard_untouched_by_new_events(self, client, session_factory):
+        """Test adding an event without offers keeps cached dashboards"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        seller_id = seller.id
+        create_offers(db, seller, 1)
+        client.get("/api/users/me/dashboard", headers=headers)
+
+        db.add(Event(name="Festival", venue_name="Park", event_date=date(2030, 6, 1), category="festival"))
+        db.commit()
+        db.close()
+
+        assert dashboard.get_cached_dashboard(seller_id) is not None
+
+    def test_dashboard_kept_after_rolled_back_bulk_update(self, client, session_factory):
+        """Test a rolled back bulk update does not drop cached dashboards"""
+        db = session_factory()
+        seller, headers = create_user(db, "seller")
+        seller_id = seller.id
+        create_offers(db, seller, 1)
+        db.close()
+        client.get("/api/users/me/dashboard", headers=headers)
+
+        db = session_factory()
+        db.query(Offer).update({"status": "sold"})
+        db.rollback()
+        db.commit()
+        db.close()
+
+        assert dashboard.get_cached_dashboard(seller_id) is not None
+
+    def test_dashboard_cache_bounded(self, session_factory, monkeypatch):
+        """Test the cache evicts the oldest dashboards past its size limit"""
+        monkeypatch.setattr(dashboard, "DASHBOARD_CACHE_MAX_ENTRIES", 2)
+        empty = empty_dashboard()
+        for user_id in (1, 2, 3):
+            dashboard.cache_dashboard(user_id, empty, dashboard.get_cache_version())
+
+        assert dashboard.get_cached_dashboard(1) is None
+        assert dashboard.get_cached_dashboard(2) is not None
+        assert dashboard.get_cached_dashboard(3) is not None
+
+    def test_dashboard_cache_evicts_expired(self, session_factory, monkeypatch):
+        """Test caching a dashboard drops expired ones"""
+        empty = empty_dashboard()
+        monkeypatch.setattr(dashboard, "DASHBOARD_CACHE_TTL", -1)
+        dashboard.cache_dashboard(1, empty, dashboard.get_cache_version())
+        monkeypatch.setattr(dashboard, "DASHBOARD_CACHE_TTL", 60)
+        dashboard.cache_dashboard(2, empty, dashboard.get_cache_version())
+
+        assert list(dashboard._cache) == [2]
+
+    def test_dashboard_requires_auth(self, client, session_factory):
+        """Test the dashboard without a token"""
+        response = client.get("/api/users/me/dashboard")
+
+        assert response.status_code in (401, 403)
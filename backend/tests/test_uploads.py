@@ -0,0 +1,211 @@
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from main import app
+from auth import get_current_user
+from models import User
+import uploads
+import asyncio
+import io
+import os
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Point the image store at a temporary directory"""
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    yield tmp_path
+    uploads.shutdown_variant_pool()
+
+@pytest.fixture
+def client():
+    """Create a test client"""
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers():
+    """Authenticate requests as a fixed user"""
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, username="uploader")
+    yield {"Authorization": "Bearer test-token"}
+    app.dependency_overrides.pop(get_current_user, None)
+
+def make_png(width=1200, height=600):
+    """Create PNG image bytes"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color=(200, 40, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+class TestImageUpload:
+    """Test image upload endpoint"""
+
+    def test_upload_image_success(self, client, upload_dir, auth_headers):
+        """Test uploading an image stores it by content hash and renders variants"""
+        body = make_png()
+        response = client.post("/api/uploads/images", content=body, headers=auth_headers)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["created"] is True
+        assert data["filename"].endswith(".png")
+        assert data["url"] == f"/api/uploads/images/{data['filename']}"
+        assert set(data["variants"]) == set(uploads.IMAGE_VARIANTS)
+        assert os.listdir(upload_dir / "incoming") == []
+
+        with Image.open(uploads.variant_path(data["filename"], "thumb")) as thumb:
+            assert max(thumb.size) == uploads.IMAGE_VARIANTS["thumb"]
+
+    def test_upload_duplicate_image(self, client, upload_dir, auth_headers):
+        """Test uploading the same content twice is deduplicated"""
+        body = make_png()
+        first = client.post("/api/uploads/images", content=body, headers=auth_headers)
+        second = client.post("/api/uploads/images", content=body, headers=auth_headers)
+
+        assert second.status_code == 200
+        assert second.json()["created"] is False
+        assert second.json()["filename"] == first.json()["filename"]
+
+    def test_duplicate_upload_renders_missing_variants(self, client, upload_dir, auth_headers):
+        """Test a duplicate upload renders variants an earlier upload did not"""
+        body = make_png()
+        filename = client.post("/api/uploads/images", content=body, headers=auth_headers).json()["filename"]
+        os.remove(uploads.variant_path(filename, "medium"))
+
+        response = client.post("/api/uploads/images", content=body, headers=auth_headers)
+
+        assert response.json()["created"] is False
+        assert not uploads.missing_variants(filename)
+
+    def test_upload_undecodable_image(self, client, upload_dir, auth_headers):
+        """Test an upload with image magic bytes but corrupt data is rejected"""
+        body = b"\x89PNG\r\n\x1a\n" + b"corrupt" * 100
+        response = client.post("/api/uploads/images", content=body, headers=auth_headers)
+
+        assert response.status_code == 422
+        assert os.listdir(upload_dir / "incoming") == []
+        assert not (upload_dir / "originals").exists()
+
+    def test_upload_too_many_pixels(self, client, upload_dir, auth_headers, monkeypatch):
+        """Test an image over the pixel limit is rejected before it is decoded"""
+        monkeypatch.setattr(uploads, "MAX_IMAGE_PIXELS", 1000 * 1000)
+        response = client.post("/api/uploads/images", content=make_png(1200, 1000), headers=auth_headers)
+
+        assert response.status_code == 422
+        assert os.listdir(upload_dir / "incoming") == []
+
+    def test_upload_split_signature(self, upload_dir):
+        """Test the image type is detected when the first chunk is shorter than the signature"""
+        body = make_png()
+
+        async def chunks():
+            yield body[:4]
+            yield body[4:]
+
+        filename, created = asyncio.run(uploads.store_image_stream(chunks()))
+
+        assert created is True
+        assert filename.endswith(".png")
+
+    def test_upload_written_in_chunks(self, upload_dir, monkeypatch):
+        """Test small body chunks are collected into CHUNK_SIZE writes"""
+        monkeypatch.setattr(uploads, "CHUNK_SIZE", 1000)
+        body = make_png()
+        writes = []
+
+        async def fake_run_in_threadpool(function, data):
+            if function is not uploads.check_image:
+                writes.append(len(data))
+            return function(data)
+
+        async def chunks():
+            for offset in range(0, len(body), 64):
+                yield body[offset:offset + 64]
+
+        monkeypatch.setattr(uploads, "run_in_threadpool", fake_run_in_threadpool)
+        filename, created = asyncio.run(uploads.store_image_stream(chunks()))
+
+        assert created is True
+        assert all(size >= 1000 for size in writes[:-1])
+        assert sum(writes) == len(body)
+        with open(uploads.original_path(filename), "rb") as stored:
+            assert stored.read() == body
+
+    def test_render_variants_leaves_no_temp_files(self, upload_dir, client, auth_headers):
+        """Test rendering variants again does not leave temporary files behind"""
+        filename = client.post("/api/uploads/images", content=make_png(), headers=auth_headers).json()["filename"]
+        for variant in uploads.IMAGE_VARIANTS:
+            os.remove(uploads.variant_path(filename, variant))
+
+        uploads.render_variants(uploads.original_path(filename), str(upload_dir), filename)
+        for variant in uploads.IMAGE_VARIANTS:
+            directory = os.path.dirname(uploads.variant_path(filename, variant))
+            assert os.listdir(directory) == [filename]
+
+    def test_upload_unsupported_type(self, client, upload_dir, auth_headers):
+        """Test uploading a non-image body"""
+        response = client.post("/api/uploads/images", content=b"not an image", headers=auth_headers)
+
+        assert response.status_code == 415
+        assert os.listdir(upload_dir / "incoming") == []
+
+    def test_upload_too_large(self, client, upload_dir, auth_headers, monkeypatch):
+        """Test uploading an image over the size limit"""
+        monkeypatch.setattr(uploads, "MAX_UPLOAD_SIZE", 1024)
+        response = client.post("/api/uploads/images", content=make_png(), headers=auth_headers)
+
+        assert response.status_code == 413
+        assert os.listdir(upload_dir / "incoming") == []
+
+    def test_upload_requires_auth(self, client, upload_dir):
+        """Test uploading without a token"""
+        response = client.post("/api/uploads/images", content=make_png())
+
+        assert response.status_code in (401, 403)
+
+class TestImageServing:
+    """Test serving uploaded images"""
+
+    def test_get_image_with_cache_headers(self, client, upload_dir, auth_headers):
+        """Test an uploaded image is served with long-lived cache headers"""
+        body = make_png()
+        url = client.post("/api/uploads/images", content=body, headers=auth_headers).json()["url"]
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response.content == body
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+
+    def test_get_image_range(self, client, upload_dir, auth_headers):
+        """Test requesting a byte range of an image"""
+        body = make_png()
+        url = client.post("/api/uploads/images", content=body, headers=auth_headers).json()["url"]
+        response = client.get(url, headers={"Range": "bytes=0-99"})
+
+        assert response.status_code == 206
+        assert response.content == body[:100]
+        assert response.headers["content-range"] == f"bytes 0-99/{len(body)}"
+
+    def test_get_image_not_modified(self, client, upload_dir, auth_headers):
+        """Test a request with a matching If-None-Match gets an empty 304"""
+        url = client.post("/api/uploads/images", content=make_png(), headers=auth_headers).json()["url"]
+        etag = client.get(url).headers["etag"]
+        response = client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_get_variant_etag(self, client, upload_dir, auth_headers):
+        """Test each variant has its own ETag"""
+        data = client.post("/api/uploads/images", content=make_png(), headers=auth_headers).json()
+        original_etag = client.get(data["url"]).headers["etag"]
+        thumb_etag = client.get(data["variants"]["thumb"]).headers["etag"]
+
+        assert thumb_etag != original_etag
+        response = client.get(data["variants"]["medium"], headers={"If-None-Match": thumb_etag})
+        assert response.status_code == 200
+
+    def test_get_image_not_found(self, client, upload_dir):
+        """Test requesting unknown or malformed image names"""
+        assert client.get(f"/api/uploads/images/{'0' * 64}.png").status_code == 404
+        assert client.get("/api/uploads/images/..%2Fmain.py").status_code == 404
+        assert client.get(f"/api/uploads/images/huge/{'0' * 64}.png").status_code == 404
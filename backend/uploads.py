@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(20 * 1024 * 1024)))
+# Uploads with more pixels are rejected before anything decodes them
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(40_000_000)))
+VARIANT_WORKERS = int(os.getenv("VARIANT_WORKERS", "2"))
+# Incoming body chunks are collected into writes of this size
+CHUNK_SIZE = 1024 * 1024
+# Bytes needed to recognise every supported image signature
+SIGNATURE_SIZE = 16
+
+# Longest edge in pixels for each generated variant
+IMAGE_VARIANTS: Dict[str, int] = {
+    "thumb": 200,
+    "medium": 800,
+}
+
+# Content is addressed by its hash, so a stored file never changes
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+)
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+FILENAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|jpg|gif|webp)$")
+
+_variant_pool: Optional[ProcessPoolExecutor] = None
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """Detect the image extension from the leading bytes of a file."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension, _ in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+def check_image(path: str) -> Optional[str]:
+    """Check that an image file decodes within the pixel limit.
+
+    Returns the reason the image was rejected, or None if it is valid.
+    """
+    from PIL import Image  # Import here so Pillow only loads once an upload arrives
+
+    try:
+        with Image.open(path) as image:
+            if image.width * image.height > MAX_IMAGE_PIXELS:
+                return "Image has too many pixels"
+            image.verify()
+    except MemoryError:
+        raise
+    except Exception:
+        return "Image could not be decoded"
+    return None
+
+
+def original_path(filename: str) -> str:
+    """Get the on-disk path of a stored original image."""
+    return os.path.join(UPLOAD_DIR, "originals", filename[:2], filename)
+
+
+def variant_path(filename: str, variant: str) -> str:
+    """Get the on-disk path of a resized variant of a stored image."""
+    return os.path.join(UPLOAD_DIR, "variants", variant, filename[:2], filename)
+
+
+async def store_image_stream(chunks: AsyncIterator[bytes]) -> Tuple[str, bool]:
+    """Stream an image body to the content-addressed store.
+
+    Chunks are hashed as they arrive and collected into CHUNK_SIZE writes to
+    a temporary file. New content is checked to decode before it is moved
+    to its content-addressed path. Returns the stored filename and whether
+    it was newly created (False for a duplicate).
+    """
+    incoming_dir = os.path.join(UPLOAD_DIR, "incoming")
+    os.makedirs(incoming_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=incoming_dir)
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    head = b""
+    size = 0
+    extension = None
+
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if extension is None:
+                    # The first chunk can be shorter than the signature
+                    head += chunk[:SIGNATURE_SIZE - len(head)]
+                    if len(head) >= SIGNATURE_SIZE:
+                        extension = detect_image_type(head)
+                        if extension is None:
+                            raise HTTPException(
+                                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Unsupported image type"
+                            )
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail="Image too large"
+                    )
+                digest.update(chunk)
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    await run_in_threadpool(temp_file.write, buffer)
+                    buffer.clear()
+            if buffer:
+                await run_in_threadpool(temp_file.write, buffer)
+
+        if not head:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Empty upload"
+            )
+        if extension is None:
+            extension = detect_image_type(head)
+            if extension is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="Unsupported image type"
+                )
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        target = original_path(filename)
+        if os.path.exists(target):
+            os.remove(temp_path)
+            return filename, False
+
+        error = await run_in_threadpool(check_image, temp_path)
+        if error is not None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=error
+            )
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_path, target)
+        return filename, True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def render_variants(source: str, upload_dir: str, filename: str) -> None:
+    """Write every missing resized variant of an image. Runs in a worker process.
+
+    The original was checked to decode before it was stored, so failures
+    here are left to the caller to log and the original is never removed.
+    """
+    from PIL import Image  # Import here so Pillow only loads once an upload arrives
+
+    with Image.open(source) as image:
+        for variant, max_edge in IMAGE_VARIANTS.items():
+            target = os.path.join(upload_dir, "variants", variant, filename[:2], filename)
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            resized = image.copy()
+            resized.thumbnail((max_edge, max_edge))
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+            try:
+                with os.fdopen(fd, "wb") as temp_file:
+                    resized.save(temp_file, format=image.format)
+                os.replace(temp_path, target)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+
+def missing_variants(filename: str) -> bool:
+    """Check whether any resized variant of a stored image is missing."""
+    return any(not os.path.exists(variant_path(filename, variant)) for variant in IMAGE_VARIANTS)
+
+
+def get_variant_pool() -> ProcessPoolExecutor:
+    """Get the process pool used for image resizing, creating it on first use."""
+    global _variant_pool
+    if _variant_pool is None:
+        _variant_pool = ProcessPoolExecutor(max_workers=VARIANT_WORKERS)
+    return _variant_pool
+
+
+def shutdown_variant_pool() -> None:
+    """Shut down the image resizing process pool if it was started."""
+    global _variant_pool
+    if _variant_pool is not None:
+        _variant_pool.shutdown(wait=True)
+        _variant_pool = None
+
+
+async def generate_variants(filename: str) -> None:
+    """Generate resized variants of a stored image in the process pool.
+
+    Failures are logged rather than raised, since this runs after the
+    response is sent. Missing variants are scheduled again on the next
+    upload of the same content.
+    """
+    global _variant_pool
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(
+            get_variant_pool(), render_variants, original_path(filename), UPLOAD_DIR, filename
+        )
+    except BrokenProcessPool:
+        logger.exception("Image resizing pool broke while rendering %s", filename)
+        _variant_pool = None
+        return
+    except Exception:
+        logger.exception("Failed to render variants of %s", filename)
+
+
+def image_urls(filename: str) -> Dict[str, str]:
+    """Get the public URLs of an image and its variants."""
+    urls = {"original": f"/api/uploads/images/{filename}"}
+    for variant in IMAGE_VARIANTS:
+        urls[variant] = f"/api/uploads/images/{variant}/{filename}"
+    return urls